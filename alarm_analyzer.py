@@ -3,10 +3,20 @@
 负责分析监控系统中的告警信息，找出告警根本原因
 """
 
-from typing import Dict, Any, List
+import re
+import sys
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta
 from analyzer_interface import AnalyzerInterface, TaskData, AnalysisResult, TaskType
 
+try:
+    from ciso8601 import parse_datetime as _parse_timestamp
+except ImportError:
+    # 未安装 ciso8601 时使用标准库解析
+    def _parse_timestamp(timestamp: str) -> datetime:
+        return datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+
 
 class AlarmAnalyzer(AnalyzerInterface):
     """告警分析器"""
@@ -28,6 +38,34 @@ class AlarmAnalyzer(AnalyzerInterface):
             'service': ['服务不可用', '服务响应异常'],
             'database': ['数据库连接异常', '查询超时']
         }
+        
+        # 关键字在构造时统一转为小写并驻留，匹配时不再逐条转换
+        self._alarm_categories_lower = {
+            category: [sys.intern(keyword.lower()) for keyword in keywords]
+            for category, keywords in self.alarm_categories.items()
+        }
+        
+        # 预编译类别匹配器：所有关键字合并为一个正则，每条告警只需扫描一次消息
+        self._keyword_category = {}
+        for category, keywords in self._alarm_categories_lower.items():
+            for keyword in keywords:
+                self._keyword_category.setdefault(keyword, category)
+        self._category_keys = tuple(self.alarm_categories)
+        self._category_rank = {category: rank for rank, category in enumerate(self._category_keys)}
+        
+        # 同一位置只返回最长的关键字，被其包含的较短关键字不会单独命中，
+        # 因此每个关键字取其包含的所有关键字中定义最靠前的类别
+        self._keyword_best_category = {
+            keyword: min(
+                (category for other, category in self._keyword_category.items() if other in keyword),
+                key=self._category_rank.__getitem__
+            )
+            for keyword in self._keyword_category
+        }
+        # 零宽前瞻匹配，关键字之间相互重叠时每个起始位置都能命中
+        self._category_matcher = re.compile('(?=(' + '|'.join(
+            re.escape(keyword) for keyword in sorted(self._keyword_category, key=len, reverse=True)
+        ) + '))')
     
     def get_name(self) -> str:
         return "AlarmAnalyzer"
@@ -46,27 +84,32 @@ class AlarmAnalyzer(AnalyzerInterface):
             findings = []
             suggestions = []
             
+            # 单次遍历告警，同时收集严重性、消息、时间和分类信息
+            severity_counts, message_counts, alarm_times, categorized, uncategorized = self._scan_alarms(alarms)
+            
             # 分析告警严重性
-            severity_analysis = self._analyze_alarm_severity(alarms)
+            severity_analysis = self._analyze_alarm_severity(severity_counts)
             findings.extend(severity_analysis)
             
             # 分析告警模式
-            pattern_analysis = self._analyze_alarm_patterns(alarms)
+            pattern_analysis = self._analyze_alarm_patterns(message_counts, len(alarms))
             findings.extend(pattern_analysis)
             
             # 分析告警时间相关性
-            temporal_analysis = self._analyze_temporal_patterns(alarms)
+            temporal_analysis = self._analyze_temporal_patterns(alarm_times)
             findings.extend(temporal_analysis)
             
             # 分类告警
-            categorized_alarms = self._categorize_alarms(alarms)
+            categorized_alarms = self._categorize_alarms(categorized, uncategorized)
             findings.extend(categorized_alarms)
             
             # 生成修复建议
             suggestions = self._generate_alarm_suggestions(findings, alarms)
             
             # 计算置信度
-            confidence = self._calculate_alarm_confidence(findings, alarms)
+            confidence = self._calculate_alarm_confidence(
+                len(alarms) - len(uncategorized), len(categorized_alarms), len(alarms)
+            )
             
             return AnalysisResult(
                 task_id=task_data.task_id,
@@ -92,14 +135,49 @@ class AlarmAnalyzer(AnalyzerInterface):
                 error_message=str(e)
             )
     
-    def _analyze_alarm_severity(self, alarms: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """分析告警严重性分布"""
-        findings = []
-        severity_counts = {}
+    def _scan_alarms(self, alarms: List[Dict[str, Any]]) -> Tuple[Counter, Counter, List[datetime],
+                                                                  Dict[str, List[Dict[str, Any]]], List[Dict[str, Any]]]:
+        """遍历一次告警列表，返回严重性计数、消息计数、告警时间、分类告警和未分类告警"""
+        if not alarms:
+            return Counter(), Counter(), [], {}, []
+        
+        severity_counts = Counter()
+        message_counts = Counter()
+        alarm_times = []
+        categorized = {category: [] for category in self._category_keys}
+        uncategorized = []
         
         for alarm in alarms:
-            severity = alarm.get('severity', 'unknown').lower()
-            severity_counts[severity] = severity_counts.get(severity, 0) + 1
+            severity_counts[alarm.get('severity', 'unknown').lower()] += 1
+            
+            message = alarm.get('message', '')
+            message_counts[message] += 1
+            
+            timestamp = alarm.get('timestamp')
+            if timestamp:
+                try:
+                    if isinstance(timestamp, str):
+                        alarm_time = _parse_timestamp(timestamp)
+                    else:
+                        alarm_time = timestamp
+                    alarm_times.append(alarm_time)
+                except:
+                    pass
+            
+            category = self._match_category(message.lower())
+            if category is not None:
+                categorized[category].append(alarm)
+            else:
+                uncategorized.append(alarm)
+        
+        return severity_counts, message_counts, alarm_times, categorized, uncategorized
+    
+    def _analyze_alarm_severity(self, severity_counts: Counter) -> List[Dict[str, Any]]:
+        """分析告警严重性分布"""
+        if not severity_counts:
+            return []
+        
+        findings = []
         
         for severity, count in severity_counts.items():
             if count > 0:
@@ -112,17 +190,16 @@ class AlarmAnalyzer(AnalyzerInterface):
         
         return findings
     
-    def _analyze_alarm_patterns(self, alarms: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _analyze_alarm_patterns(self, message_counts: Counter, total_alarms: int) -> List[Dict[str, Any]]:
         """分析告警模式"""
+        # 不同消息数等于告警总数时说明没有重复告警
+        if len(message_counts) == total_alarms:
+            return []
+        
         findings = []
         
         # 分析重复告警
-        alarm_messages = {}
-        for alarm in alarms:
-            message = alarm.get('message', '')
-            alarm_messages[message] = alarm_messages.get(message, 0) + 1
-        
-        for message, count in alarm_messages.items():
+        for message, count in message_counts.items():
             if count > 1:
                 findings.append({
                     'type': 'repeated_alarm',
@@ -133,36 +210,16 @@ class AlarmAnalyzer(AnalyzerInterface):
         
         return findings
     
-    def _analyze_temporal_patterns(self, alarms: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _analyze_temporal_patterns(self, alarm_times: List[datetime]) -> List[Dict[str, Any]]:
         """分析告警时间模式"""
         findings = []
         
-        if not alarms:
-            return findings
-        
         # 分析告警时间集中度
-        alarm_times = []
-        for alarm in alarms:
-            timestamp = alarm.get('timestamp')
-            if timestamp:
-                try:
-                    if isinstance(timestamp, str):
-                        alarm_time = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                    else:
-                        alarm_time = timestamp
-                    alarm_times.append(alarm_time)
-                except:
-                    continue
-        
         if len(alarm_times) > 1:
             # 检查告警是否在短时间内集中发生
-            alarm_times.sort()
-            time_diffs = []
-            for i in range(1, len(alarm_times)):
-                diff = (alarm_times[i] - alarm_times[i-1]).total_seconds()
-                time_diffs.append(diff)
-            
-            avg_interval = sum(time_diffs) / len(time_diffs) if time_diffs else 0
+            # 排序后相邻间隔之和等于首尾时间差，平均间隔无需排序和逐对求差
+            time_span = (max(alarm_times) - min(alarm_times)).total_seconds()
+            avg_interval = time_span / (len(alarm_times) - 1)
             
             if avg_interval < 300:  # 5分钟内
                 findings.append({
@@ -174,24 +231,13 @@ class AlarmAnalyzer(AnalyzerInterface):
         
         return findings
     
-    def _categorize_alarms(self, alarms: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """对告警进行分类"""
-        findings = []
-        categorized = {category: [] for category in self.alarm_categories.keys()}
-        uncategorized = []
+    def _categorize_alarms(self, categorized: Dict[str, List[Dict[str, Any]]],
+                           uncategorized: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """生成告警分类结果"""
+        if not categorized and not uncategorized:
+            return []
         
-        for alarm in alarms:
-            message = alarm.get('message', '').lower()
-            categorized_flag = False
-            
-            for category, keywords in self.alarm_categories.items():
-                if any(keyword.lower() in message for keyword in keywords):
-                    categorized[category].append(alarm)
-                    categorized_flag = True
-                    break
-            
-            if not categorized_flag:
-                uncategorized.append(alarm)
+        findings = []
         
         for category, category_alarms in categorized.items():
             if category_alarms:
@@ -199,7 +245,8 @@ class AlarmAnalyzer(AnalyzerInterface):
                     'type': 'alarm_category',
                     'category': category,
                     'count': len(category_alarms),
-                    'alarms': category_alarms
+                    'alarm_ids': [alarm.get('id') for alarm in category_alarms],
+                    'search_text': self._alarm_search_text(category_alarms)
                 })
         
         if uncategorized:
@@ -207,11 +254,24 @@ class AlarmAnalyzer(AnalyzerInterface):
                 'type': 'alarm_category',
                 'category': 'uncategorized',
                 'count': len(uncategorized),
-                'alarms': uncategorized
+                'alarm_ids': [alarm.get('id') for alarm in uncategorized],
+                'search_text': self._alarm_search_text(uncategorized)
             })
         
         return findings
     
+    def _alarm_search_text(self, alarms: List[Dict[str, Any]]) -> str:
+        """由完整告警生成小写检索文本，总结智能体按发现文本匹配根因关键字，需要包含告警的全部字段"""
+        return ' '.join(str(alarm) for alarm in alarms).lower()
+    
+    def _match_category(self, message: str) -> Optional[str]:
+        """匹配告警消息所属类别，命中多个类别时按类别定义顺序取第一个"""
+        return min(
+            (self._keyword_best_category[match.group(1)] for match in self._category_matcher.finditer(message)),
+            key=self._category_rank.__getitem__,
+            default=None
+        )
+    
     def _generate_alarm_suggestions(self, findings: List[Dict[str, Any]], alarms: List[Dict[str, Any]]) -> List[str]:
         """生成告警修复建议"""
         suggestions = []
@@ -248,21 +308,17 @@ class AlarmAnalyzer(AnalyzerInterface):
         
         return suggestions
     
-    def _calculate_alarm_confidence(self, findings: List[Dict[str, Any]], alarms: List[Dict[str, Any]]) -> float:
+    def _calculate_alarm_confidence(self, categorized_count: int, num_categories_hit: int, total_alarms: int) -> float:
         """计算告警分析置信度"""
-        if not findings or not alarms:
+        if not total_alarms:
             return 0.0
         
         # 基于分类告警的覆盖率计算置信度
-        categorized_count = sum(f.get('count', 0) for f in findings if f.get('type') == 'alarm_category' and f.get('category') != 'uncategorized')
-        total_alarms = len(alarms)
-        
-        coverage_ratio = categorized_count / total_alarms if total_alarms > 0 else 0
+        coverage_ratio = categorized_count / total_alarms
         base_confidence = 0.5 + (coverage_ratio * 0.4)
         
         # 根据告警严重性调整置信度
-        high_severity_findings = len([f for f in findings if f.get('type') == 'alarm_category'])
-        if high_severity_findings > 0:
+        if num_categories_hit > 0:
             base_confidence += 0.1
         
         return round(min(base_confidence, 1.0), 2)
\ No newline at end of file
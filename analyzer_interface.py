@@ -10,7 +10,7 @@ from enum import Enum
 import datetime
 
 
-class TaskType(Enum):
+class TaskType(str, Enum):
     """任务类型枚举"""
     LOG_ANALYSIS = "log_analysis"
     ALARM_ANALYSIS = "alarm_analysis"
@@ -27,7 +27,7 @@ class Priority(Enum):
     CRITICAL = 4
 
 
-@dataclass
+@dataclass(slots=True)
 class TaskData:
     """任务数据结构"""
     task_id: str
@@ -38,7 +38,7 @@ class TaskData:
     timestamp: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class AnalysisResult:
     """分析结果数据结构"""
     task_id: str
@@ -49,6 +49,16 @@ class AnalysisResult:
     suggestions: List[str]
     metadata: Optional[Dict[str, Any]] = None
     error_message: Optional[str] = None
+    
+    def to_summary_dict(self) -> Dict[str, Any]:
+        """获取结果摘要"""
+        return {
+            'analyzer': self.analyzer_name,
+            'success': self.success,
+            'confidence': self.confidence,
+            'findings_count': len(self.findings),
+            'suggestions_count': len(self.suggestions)
+        }
 
 
 class AnalyzerInterface(ABC):
@@ -3,7 +3,7 @@
 根据任务类型动态选择合适的分析器，支持插件式扩展
 """
 
-from typing import Dict, Any, List, Optional, Type
+from typing import Dict, Any, List, Optional, Tuple, Type
 from analyzer_interface import AnalyzerInterface, TaskData, TaskType
 from log_analyzer import LogAnalyzer
 from alarm_analyzer import AlarmAnalyzer
@@ -14,7 +14,11 @@ class AnalyzerSelector:
     
     def __init__(self):
         self.analyzers: Dict[str, AnalyzerInterface] = {}
-        self.task_type_mapping: Dict[TaskType, List[str]] = {}
+        self.task_type_mapping: Dict[TaskType, Tuple[str, ...]] = {}
+        self._analyzer_task_types: Dict[str, Tuple[TaskType, ...]] = {}
+        self._resolved: Dict[TaskType, Tuple[AnalyzerInterface, ...]] = {}
+        self._cached_types: Tuple[TaskType, ...] = ()
+        self._cached_analyzers: Tuple[AnalyzerInterface, ...] = ()
         self._initialize_default_analyzers()
     
     def _initialize_default_analyzers(self):
@@ -26,54 +30,69 @@ class AnalyzerSelector:
     def register_analyzer(self, analyzer: AnalyzerInterface):
         """注册分析器"""
         name = analyzer.get_name()
+        task_types = tuple(analyzer.get_supported_task_types())
+        
+        # 同名分析器重新注册时，先移除旧实例登记的任务类型映射
+        if name in self.analyzers:
+            self._remove_task_type_mapping(name)
+        
         self.analyzers[name] = analyzer
+        # 缓存支持的任务类型，注销时无需再次调用分析器
+        self._analyzer_task_types[name] = task_types
         
         # 更新任务类型映射
-        for task_type in analyzer.get_supported_task_types():
-            if task_type not in self.task_type_mapping:
-                self.task_type_mapping[task_type] = []
-            if name not in self.task_type_mapping[task_type]:
-                self.task_type_mapping[task_type].append(name)
+        for task_type in task_types:
+            names = self.task_type_mapping.get(task_type, ())
+            if name not in names:
+                self.task_type_mapping[task_type] = names + (name,)
+        
+        self._rebuild_caches()
     
     def unregister_analyzer(self, analyzer_name: str):
         """注销分析器"""
         if analyzer_name in self.analyzers:
-            analyzer = self.analyzers[analyzer_name]
             del self.analyzers[analyzer_name]
             
             # 更新任务类型映射
-            for task_type in analyzer.get_supported_task_types():
-                if task_type in self.task_type_mapping:
-                    if analyzer_name in self.task_type_mapping[task_type]:
-                        self.task_type_mapping[task_type].remove(analyzer_name)
+            self._remove_task_type_mapping(analyzer_name)
+            
+            self._rebuild_caches()
+    
+    def _remove_task_type_mapping(self, analyzer_name: str):
+        """从任务类型映射中移除分析器登记的所有任务类型"""
+        for task_type in self._analyzer_task_types.pop(analyzer_name, ()):
+            names = self.task_type_mapping.get(task_type, ())
+            if analyzer_name in names:
+                self.task_type_mapping[task_type] = tuple(n for n in names if n != analyzer_name)
+    
+    def _rebuild_caches(self):
+        """注册信息变化后重建分析器引用和查询结果缓存"""
+        self._resolved = {
+            task_type: tuple(self.analyzers[name] for name in names if name in self.analyzers)
+            for task_type, names in self.task_type_mapping.items()
+        }
+        self._cached_types = tuple(self.task_type_mapping)
+        self._cached_analyzers = tuple(self.analyzers.values())
     
     def select_analyzers(self, task_data: TaskData) -> List[AnalyzerInterface]:
         """根据任务数据选择合适的分析器"""
-        suitable_analyzers = []
-        
-        # 根据任务类型查找分析器
-        task_type = task_data.task_type
-        if task_type in self.task_type_mapping:
-            analyzer_names = self.task_type_mapping[task_type]
-            
-            for name in analyzer_names:
-                analyzer = self.analyzers.get(name)
-                if analyzer and analyzer.can_handle_task(task_data):
-                    suitable_analyzers.append(analyzer)
-        
-        return suitable_analyzers
+        # 根据任务类型直接取出已解析的分析器
+        return [
+            analyzer for analyzer in self._resolved.get(task_data.task_type, ())
+            if analyzer.can_handle_task(task_data)
+        ]
     
     def get_analyzer_by_name(self, name: str) -> Optional[AnalyzerInterface]:
         """根据名称获取分析器"""
         return self.analyzers.get(name)
     
-    def get_all_analyzers(self) -> List[AnalyzerInterface]:
+    def get_all_analyzers(self) -> Tuple[AnalyzerInterface, ...]:
         """获取所有注册的分析器"""
-        return list(self.analyzers.values())
+        return self._cached_analyzers
     
-    def get_supported_task_types(self) -> List[TaskType]:
+    def get_supported_task_types(self) -> Tuple[TaskType, ...]:
         """获取所有支持的任务类型"""
-        return list(self.task_type_mapping.keys())
+        return self._cached_types
     
     def validate_analyzer_compatibility(self, analyzer: AnalyzerInterface) -> bool:
         """验证分析器兼容性"""
@@ -0,0 +1,33 @@
+"""
+有界字典实现
+超过容量上限时按插入顺序淘汰最早的条目，用于长期运行服务中的结果缓存
+"""
+
+from collections import OrderedDict
+
+
+class BoundedDict(OrderedDict):
+    """容量有上限的字典，超出上限时淘汰最早写入的条目
+    
+    读取时调用 move_to_end 刷新条目，即可按最近使用顺序淘汰
+    """
+    
+    def __init__(self, max_size: int = 10_000):
+        if max_size <= 0:
+            raise ValueError("max_size 必须大于 0")
+        super().__init__()
+        self.max_size = max_size
+    
+    def __setitem__(self, key, value):
+        # 覆盖已有键时移到末尾，视为最新写入
+        if key in self:
+            self.move_to_end(key)
+        super().__setitem__(key, value)
+        if len(self) > self.max_size:
+            self.popitem(last=False)
+    
+    def copy(self) -> 'BoundedDict':
+        """复制时保留容量上限"""
+        new = type(self)(self.max_size)
+        new.update(self)
+        return new
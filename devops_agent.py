@@ -5,18 +5,22 @@ DevOps智能体主应用程序
 
 import asyncio
 import uuid
+from datetime import datetime
 from typing import Dict, Any, List, Optional
 from langgraph.graph import StateGraph, END
 from langgraph.graph.message import add_messages
 from typing_extensions import TypedDict
+from analyzer_interface import AnalysisResult
 from planner import Planner
 
 
 class AgentState(TypedDict):
     """智能体状态定义"""
     incident_data: Dict[str, Any]
+    started_at: str
     current_task: Optional[str]
     analysis_results: List[Dict[str, Any]]
+    _analysis_result_objs: List[AnalysisResult]
     final_report: Optional[Dict[str, Any]]
     error_message: Optional[str]
     messages: List[Dict[str, Any]]
@@ -45,7 +49,6 @@ class DevOpsAgent:
         
         # 定义工作流边
         workflow.set_entry_point("parse_input")
-        workflow.add_edge("parse_input", "plan_analysis")
         workflow.add_edge("plan_analysis", "execute_analysis")
         workflow.add_edge("execute_analysis", "generate_summary")
         workflow.add_edge("generate_summary", "create_report")
@@ -93,7 +96,7 @@ class DevOpsAgent:
             incident_data = state['incident_data']
             
             # 创建分析计划
-            tasks = self.planner._create_analysis_plan(incident_data)
+            tasks = self.planner._create_analysis_plan(incident_data, state['started_at'])
             
             state['messages'] = add_messages(
                 state.get('messages', []),
@@ -131,6 +134,8 @@ class DevOpsAgent:
             ]
             
             state['analysis_results'] = analysis_results
+            # 保留原始结果对象，供总结节点直接使用，避免字典与对象之间的往返转换
+            state['_analysis_result_objs'] = results
             state['messages'] = add_messages(
                 state.get('messages', []),
                 [{"role": "system", "content": f"完成 {len(results)} 个分析任务"}]
@@ -146,21 +151,10 @@ class DevOpsAgent:
     async def _generate_summary_node(self, state: AgentState) -> AgentState:
         """生成总结报告节点"""
         try:
-            analysis_results = state.get('analysis_results', [])
+            analysis_results = state.get('_analysis_result_objs', [])
             
             # 生成总结
-            summary_result = await self.planner._generate_summary_report([
-                AnalysisResult(
-                    task_id=r['task_id'],
-                    analyzer_name=r['analyzer_name'],
-                    success=r['success'],
-                    findings=r['findings'],
-                    confidence=r['confidence'],
-                    suggestions=r['suggestions'],
-                    error_message=r.get('error_message')
-                )
-                for r in analysis_results
-            ])
+            summary_result = await self.planner._generate_summary_report(analysis_results, state['started_at'])
             
             state['summary_result'] = {
                 'success': summary_result.success,
@@ -193,7 +187,7 @@ class DevOpsAgent:
             final_report = {
                 'success': True,
                 'incident_id': incident_data.get('incident_id', str(uuid.uuid4())),
-                'analysis_timestamp': datetime.now().isoformat(),
+                'analysis_timestamp': state['started_at'],
                 'input_summary': {
                     'logs_provided': 'logs' in incident_data,
                     'alarms_provided': 'alarms' in incident_data,
@@ -229,7 +223,7 @@ class DevOpsAgent:
         state['final_report'] = {
             'success': False,
             'error': error_message,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': state['started_at']
         }
         
         state['messages'] = add_messages(
@@ -247,10 +241,13 @@ class DevOpsAgent:
     
     async def analyze_incident(self, incident_data: Dict[str, Any]) -> Dict[str, Any]:
         """分析故障事件"""
+        # 事件开始时间只取一次，各节点复用
         initial_state = AgentState(
             incident_data=incident_data,
+            started_at=datetime.now().isoformat(),
             current_task=None,
             analysis_results=[],
+            _analysis_result_objs=[],
             final_report=None,
             error_message=None,
             messages=[]
@@ -262,5 +259,5 @@ class DevOpsAgent:
         return final_state.get('final_report', {
             'success': False,
             'error': '工作流执行失败',
-            'timestamp': datetime.now().isoformat()
+            'timestamp': initial_state['started_at']
         })
\ No newline at end of file
@@ -5,7 +5,9 @@
 
 import re
 import json
-from typing import Dict, Any, List
+import asyncio
+from collections import Counter
+from typing import Dict, Any, Iterable, List, Tuple
 from datetime import datetime
 from analyzer_interface import AnalyzerInterface, TaskData, AnalysisResult, TaskType, Priority
 
@@ -33,6 +35,27 @@ class LogAnalyzer(AnalyzerInterface):
             r'High CPU',
             r'Memory usage'
         ]
+        
+        self.performance_patterns = [
+            r'slow.*query',
+            r'high.*cpu',
+            r'memory.*usage',
+            r'response.*time.*\d+ms',
+            r'timeout'
+        ]
+        
+        # 错误和警告模式均为普通关键字，转小写后直接做子串匹配
+        self._error_literals = [(pattern, pattern.lower()) for pattern in self.error_patterns]
+        self._warning_literals = [(pattern, pattern.lower()) for pattern in self.warning_patterns]
+        # 性能模式包含正则语法，按小写预编译，直接匹配已转小写的日志行
+        self._performance_re = [(pattern, re.compile(pattern.lower())) for pattern in self.performance_patterns]
+        
+        # 扫描规则：(发现类型, 严重程度, 关键字模式, 正则模式)，按报告中的输出顺序排列
+        self._scan_rules = [
+            ('error', 'high', self._error_literals, []),
+            ('warning', 'medium', self._warning_literals, []),
+            ('performance', 'medium', [], self._performance_re)
+        ]
     
     def get_name(self) -> str:
         return "LogAnalyzer"
@@ -48,26 +71,22 @@ class LogAnalyzer(AnalyzerInterface):
         """分析日志数据"""
         try:
             logs = task_data.input_data.get('logs', [])
-            findings = []
             suggestions = []
             
-            # 分析错误日志
-            error_findings = self._analyze_errors(logs)
-            findings.extend(error_findings)
+            # 单次遍历日志，同时分析错误、警告和性能问题
+            # 扫描为纯计算，放到线程中执行，避免阻塞事件循环上的其他分析任务
+            # 日志可以是列表或任意可迭代对象（如生成器、文件句柄），行数在扫描中统计
+            # 流式日志只能扫描一次，规划器不会对这类任务重新执行分析
+            findings, total_logs = await asyncio.to_thread(self._scan_logs, logs)
             
-            # 分析警告日志
-            warning_findings = self._analyze_warnings(logs)
-            findings.extend(warning_findings)
-            
-            # 分析性能问题
-            performance_findings = self._analyze_performance(logs)
-            findings.extend(performance_findings)
+            # 统计各类型和严重程度的发现数量，供建议和置信度计算共用
+            type_counts, severity_counts = self._count_findings(findings)
             
             # 生成修复建议
-            suggestions = self._generate_suggestions(findings)
+            suggestions = self._generate_suggestions(findings, type_counts)
             
             # 计算置信度
-            confidence = self._calculate_confidence(findings)
+            confidence = self._calculate_confidence(severity_counts)
             
             return AnalysisResult(
                 task_id=task_data.task_id,
@@ -77,7 +96,7 @@ class LogAnalyzer(AnalyzerInterface):
                 confidence=confidence,
                 suggestions=suggestions,
                 metadata={
-                    'total_logs_analyzed': len(logs),
+                    'total_logs_analyzed': total_logs,
                     'analysis_timestamp': datetime.now().isoformat()
                 }
             )
@@ -93,72 +112,53 @@ class LogAnalyzer(AnalyzerInterface):
                 error_message=str(e)
             )
     
-    def _analyze_errors(self, logs: List[str]) -> List[Dict[str, Any]]:
-        """分析错误日志"""
-        findings = []
-        
-        for i, log in enumerate(logs):
-            for pattern in self.error_patterns:
-                if re.search(pattern, log, re.IGNORECASE):
+    def _scan_logs(self, logs: Iterable[str]) -> Tuple[List[Dict[str, Any]], int]:
+        """单次遍历日志，匹配所有错误、警告和性能模式，返回发现列表和日志行数"""
+        # 每类发现单独收集，保持错误、警告、性能的输出顺序
+        grouped_findings = [[] for _ in self._scan_rules]
+        
+        line_no = 0
+        for line_no, log in enumerate(logs, 1):
+            log_lower = log.lower()
+            content = None
+            for findings, (finding_type, severity, literals, regexes) in zip(grouped_findings, self._scan_rules):
+                matched = [pattern for pattern, keyword in literals if keyword in log_lower]
+                matched.extend(pattern for pattern, regex in regexes if regex.search(log_lower))
+                if not matched:
+                    continue
+                
+                # 只有命中的行才生成内容，同一行的多个发现共享该内容
+                if content is None:
+                    content = log.strip()
+                for pattern in matched:
                     findings.append({
-                        'type': 'error',
+                        'type': finding_type,
                         'pattern': pattern,
-                        'log_line': i + 1,
-                        'content': log.strip(),
-                        'severity': 'high'
+                        'log_line': line_no,
+                        'content': content,
+                        'severity': severity
                     })
         
-        return findings
+        return [finding for findings in grouped_findings for finding in findings], line_no
     
-    def _analyze_warnings(self, logs: List[str]) -> List[Dict[str, Any]]:
-        """分析警告日志"""
-        findings = []
+    def _count_findings(self, findings: List[Dict[str, Any]]) -> Tuple[Counter, Counter]:
+        """单次遍历发现，统计各类型和各严重程度的数量"""
+        type_counts = Counter()
+        severity_counts = Counter()
         
-        for i, log in enumerate(logs):
-            for pattern in self.warning_patterns:
-                if re.search(pattern, log, re.IGNORECASE):
-                    findings.append({
-                        'type': 'warning',
-                        'pattern': pattern,
-                        'log_line': i + 1,
-                        'content': log.strip(),
-                        'severity': 'medium'
-                    })
-        
-        return findings
-    
-    def _analyze_performance(self, logs: List[str]) -> List[Dict[str, Any]]:
-        """分析性能相关日志"""
-        findings = []
-        
-        performance_patterns = [
-            r'slow.*query',
-            r'high.*cpu',
-            r'memory.*usage',
-            r'response.*time.*\d+ms',
-            r'timeout'
-        ]
-        
-        for i, log in enumerate(logs):
-            for pattern in performance_patterns:
-                if re.search(pattern, log, re.IGNORECASE):
-                    findings.append({
-                        'type': 'performance',
-                        'pattern': pattern,
-                        'log_line': i + 1,
-                        'content': log.strip(),
-                        'severity': 'medium'
-                    })
+        for finding in findings:
+            type_counts[finding['type']] += 1
+            severity_counts[finding['severity']] += 1
         
-        return findings
+        return type_counts, severity_counts
     
-    def _generate_suggestions(self, findings: List[Dict[str, Any]]) -> List[str]:
+    def _generate_suggestions(self, findings: List[Dict[str, Any]], type_counts: Counter) -> List[str]:
         """基于发现的问题生成修复建议"""
         suggestions = []
         
-        error_count = len([f for f in findings if f['type'] == 'error'])
-        warning_count = len([f for f in findings if f['type'] == 'warning'])
-        performance_count = len([f for f in findings if f['type'] == 'performance'])
+        error_count = type_counts['error']
+        warning_count = type_counts['warning']
+        performance_count = type_counts['performance']
         
         if error_count > 0:
             suggestions.append(f"发现 {error_count} 个错误，建议优先处理错误日志中的异常")
@@ -170,26 +170,26 @@ class LogAnalyzer(AnalyzerInterface):
             suggestions.append(f"发现 {performance_count} 个性能问题，建议优化查询和资源配置")
         
         # 具体模式建议
-        patterns_found = [f['pattern'] for f in findings]
-        if 'Connection refused' in str(patterns_found):
+        patterns_found = {f['pattern'] for f in findings}
+        if 'Connection refused' in patterns_found:
             suggestions.append("检测到连接拒绝错误，建议检查服务状态和网络连接")
         
-        if 'Out of memory' in str(patterns_found):
+        if 'Out of memory' in patterns_found:
             suggestions.append("检测到内存不足，建议增加内存或优化内存使用")
         
-        if 'Timeout' in str(patterns_found):
+        if 'Timeout' in patterns_found:
             suggestions.append("检测到超时错误，建议检查网络延迟和服务响应时间")
         
         return suggestions
     
-    def _calculate_confidence(self, findings: List[Dict[str, Any]]) -> float:
+    def _calculate_confidence(self, severity_counts: Counter) -> float:
         """计算分析置信度"""
-        if not findings:
+        if not severity_counts:
             return 0.0
         
         # 根据发现的问题数量和严重程度计算置信度
-        high_severity_count = len([f for f in findings if f.get('severity') == 'high'])
-        medium_severity_count = len([f for f in findings if f.get('severity') == 'medium'])
+        high_severity_count = severity_counts['high']
+        medium_severity_count = severity_counts['medium']
         
         base_confidence = min(0.9, 0.3 + (high_severity_count * 0.2) + (medium_severity_count * 0.1))
         
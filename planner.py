@@ -5,10 +5,12 @@
 
 import asyncio
 import uuid
-from typing import Dict, Any, List, Optional
+from collections.abc import Iterator
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 from analyzer_interface import TaskData, AnalysisResult, TaskType, Priority
 from analyzer_selector import AnalyzerSelector
+from bounded_dict import BoundedDict
 from task_reallocator import TaskReallocator
 from summary_agent import SummaryAgent
 
@@ -16,28 +18,32 @@ from summary_agent import SummaryAgent
 class Planner:
     """DevOps智能体规划器"""
     
-    def __init__(self):
+    def __init__(self, max_completed_tasks: int = 10_000):
         self.analyzer_selector = AnalyzerSelector()
         self.task_reallocator = TaskReallocator(self.analyzer_selector)
         self.summary_agent = SummaryAgent()
         self.task_queue: List[TaskData] = []
-        self.completed_tasks: Dict[str, AnalysisResult] = {}
+        # 已完成任务只保留最近的结果，避免长期运行时无限增长
+        self.completed_tasks: Dict[str, AnalysisResult] = BoundedDict(max_completed_tasks)
         self.active_tasks: Dict[str, TaskData] = {}
     
     async def process_incident(self, incident_data: Dict[str, Any]) -> Dict[str, Any]:
         """处理故障事件的主入口"""
+        # 每次请求只取一次当前时间，各步骤共用
+        now_iso = datetime.now().isoformat()
+        
         try:
             # 解析输入并生成任务计划
-            tasks = self._create_analysis_plan(incident_data)
+            tasks = self._create_analysis_plan(incident_data, now_iso)
             
             # 执行分析任务
             analysis_results = await self._execute_analysis_tasks(tasks)
             
             # 生成总结报告
-            summary_result = await self._generate_summary_report(analysis_results)
+            summary_result = await self._generate_summary_report(analysis_results, now_iso)
             
             # 生成最终报告
-            final_report = self._create_final_report(incident_data, analysis_results, summary_result)
+            final_report = self._create_final_report(incident_data, analysis_results, summary_result, now_iso)
             
             return final_report
             
@@ -45,10 +51,10 @@ class Planner:
             return {
                 'success': False,
                 'error': str(e),
-                'timestamp': datetime.now().isoformat()
+                'timestamp': now_iso
             }
     
-    def _create_analysis_plan(self, incident_data: Dict[str, Any]) -> List[TaskData]:
+    def _create_analysis_plan(self, incident_data: Dict[str, Any], now_iso: str) -> List[TaskData]:
         """根据输入数据创建分析计划"""
         tasks = []
         
@@ -59,7 +65,7 @@ class Planner:
                 task_type=TaskType.LOG_ANALYSIS,
                 priority=Priority.HIGH,
                 input_data={'logs': incident_data['logs']},
-                timestamp=datetime.now().isoformat()
+                timestamp=now_iso
             )
             tasks.append(log_task)
         
@@ -69,7 +75,7 @@ class Planner:
                 task_type=TaskType.ALARM_ANALYSIS,
                 priority=Priority.HIGH,
                 input_data={'alarms': incident_data['alarms']},
-                timestamp=datetime.now().isoformat()
+                timestamp=now_iso
             )
             tasks.append(alarm_task)
         
@@ -80,111 +86,95 @@ class Planner:
     
     async def _execute_analysis_tasks(self, tasks: List[TaskData]) -> List[AnalysisResult]:
         """执行分析任务"""
-        results = []
+        # 各任务相互独立，并发执行，结果顺序与任务顺序一致
+        return list(await asyncio.gather(*(self._execute_task(task) for task in tasks)))
+    
+    async def _execute_task(self, task: TaskData) -> AnalysisResult:
+        """执行单个分析任务"""
+        # 选择合适的分析器
+        analyzers = self.analyzer_selector.select_analyzers(task)
         
-        for task in tasks:
-            # 选择合适的分析器
-            analyzers = self.analyzer_selector.select_analyzers(task)
-            
-            if not analyzers:
-                # 没有合适的分析器
-                result = AnalysisResult(
-                    task_id=task.task_id,
-                    analyzer_name="none",
-                    success=False,
-                    findings=[],
-                    confidence=0.0,
-                    suggestions=[],
-                    error_message="没有找到合适的分析器"
-                )
-                results.append(result)
-                continue
+        if not analyzers:
+            # 没有合适的分析器
+            return AnalysisResult(
+                task_id=task.task_id,
+                analyzer_name="none",
+                success=False,
+                findings=[],
+                confidence=0.0,
+                suggestions=[],
+                error_message="没有找到合适的分析器"
+            )
+        
+        # 使用第一个合适的分析器执行任务
+        analyzer = analyzers[0]
+        self.active_tasks[task.task_id] = task
+        
+        try:
+            result = await analyzer.analyze(task)
             
-            # 使用第一个合适的分析器执行任务
-            analyzer = analyzers[0]
-            self.active_tasks[task.task_id] = task
+            # 检查是否需要重调度
+            if not result.success or result.confidence < 0.3:
+                reallocated_task = self.task_reallocator.reallocate_task(task, result)
+                if reallocated_task.task_id != task.task_id and self._can_reanalyze(reallocated_task):
+                    # 重新执行任务
+                    new_analyzers = self.analyzer_selector.select_analyzers(reallocated_task)
+                    if new_analyzers:
+                        result = await new_analyzers[0].analyze(reallocated_task)
             
-            try:
-                result = await analyzer.analyze(task)
-                
-                # 检查是否需要重调度
-                if not result.success or result.confidence < 0.3:
-                    reallocated_task = await self.task_reallocator.reallocate_task(task, result)
-                    if reallocated_task.task_id != task.task_id:
-                        # 重新执行任务
-                        new_analyzers = self.analyzer_selector.select_analyzers(reallocated_task)
-                        if new_analyzers:
-                            result = await new_analyzers[0].analyze(reallocated_task)
-                
-                results.append(result)
-                self.completed_tasks[task.task_id] = result
-                
-            except Exception as e:
-                error_result = AnalysisResult(
-                    task_id=task.task_id,
-                    analyzer_name=analyzer.get_name(),
-                    success=False,
-                    findings=[],
-                    confidence=0.0,
-                    suggestions=[],
-                    error_message=str(e)
-                )
-                results.append(error_result)
+            self.completed_tasks[task.task_id] = result
+            return result
             
-            finally:
-                if task.task_id in self.active_tasks:
-                    del self.active_tasks[task.task_id]
+        except Exception as e:
+            return AnalysisResult(
+                task_id=task.task_id,
+                analyzer_name=analyzer.get_name(),
+                success=False,
+                findings=[],
+                confidence=0.0,
+                suggestions=[],
+                error_message=str(e)
+            )
         
-        return results
+        finally:
+            if task.task_id in self.active_tasks:
+                del self.active_tasks[task.task_id]
     
-    async def _generate_summary_report(self, analysis_results: List[AnalysisResult]) -> AnalysisResult:
+    def _can_reanalyze(self, task: TaskData) -> bool:
+        """判断任务能否重新执行：生成器、文件句柄等流式输入只能读取一次，首次分析后已耗尽"""
+        return not any(isinstance(value, Iterator) for value in task.input_data.values())
+    
+    async def _generate_summary_report(self, analysis_results: List[AnalysisResult],
+                                       now_iso: str) -> AnalysisResult:
         """生成总结报告"""
         summary_task = TaskData(
             task_id=str(uuid.uuid4()),
             task_type=TaskType.SUMMARY,
             priority=Priority.CRITICAL,
-            input_data={
-                'analysis_results': [
-                    {
-                        'task_id': r.task_id,
-                        'analyzer_name': r.analyzer_name,
-                        'success': r.success,
-                        'findings': r.findings,
-                        'confidence': r.confidence,
-                        'suggestions': r.suggestions,
-                        'error_message': r.error_message
-                    }
-                    for r in analysis_results
-                ]
-            },
-            timestamp=datetime.now().isoformat()
+            # 进程内直接传递结果对象，无需转换为字典
+            input_data={'analysis_results': analysis_results},
+            timestamp=now_iso
         )
         
         return await self.summary_agent.analyze(summary_task)
     
     def _create_final_report(self, incident_data: Dict[str, Any], 
                            analysis_results: List[AnalysisResult], 
-                           summary_result: AnalysisResult) -> Dict[str, Any]:
+                           summary_result: AnalysisResult,
+                           now_iso: str) -> Dict[str, Any]:
         """创建最终报告"""
+        immediate_actions, follow_up_actions = self._classify_suggestions(summary_result.suggestions)
+        
         return {
             'success': True,
             'incident_id': incident_data.get('incident_id', str(uuid.uuid4())),
-            'analysis_timestamp': datetime.now().isoformat(),
+            'analysis_timestamp': now_iso,
             'input_summary': {
                 'logs_provided': 'logs' in incident_data,
                 'alarms_provided': 'alarms' in incident_data,
                 'incident_description': incident_data.get('description', '')
             },
-            'analysis_results': [
-                {
-                    'analyzer': result.analyzer_name,
-                    'success': result.success,
-                    'confidence': result.confidence,
-                    'findings_count': len(result.findings),
-                    'suggestions_count': len(result.suggestions)
-                }
-                for result in analysis_results
-            ],
+            'analysis_results': [result.to_summary_dict() for result in analysis_results],
             'summary': {
                 'success': summary_result.success,
                 'confidence': summary_result.confidence,
@@ -192,31 +182,24 @@ class Planner:
                 'suggestions': summary_result.suggestions
             },
             'recommendations': {
-                'immediate_actions': self._extract_immediate_actions(summary_result),
-                'follow_up_actions': self._extract_follow_up_actions(summary_result),
+                'immediate_actions': immediate_actions,
+                'follow_up_actions': follow_up_actions,
                 'preventive_measures': self._extract_preventive_measures(summary_result)
             }
         }
     
-    def _extract_immediate_actions(self, summary_result: AnalysisResult) -> List[str]:
-        """提取立即行动建议"""
+    def _classify_suggestions(self, suggestions: List[str]) -> Tuple[List[str], List[str]]:
+        """单次遍历建议，分为立即行动建议和后续行动建议"""
         immediate_actions = []
+        follow_up_actions = []
         
-        for suggestion in summary_result.suggestions:
+        for suggestion in suggestions:
             if '【紧急】' in suggestion or '【高优先级】' in suggestion:
                 immediate_actions.append(suggestion)
-        
-        return immediate_actions
-    
-    def _extract_follow_up_actions(self, summary_result: AnalysisResult) -> List[str]:
-        """提取后续行动建议"""
-        follow_up_actions = []
-        
-        for suggestion in summary_result.suggestions:
-            if '【中优先级】' in suggestion:
+            elif '【中优先级】' in suggestion:
                 follow_up_actions.append(suggestion)
         
-        return follow_up_actions
+        return immediate_actions, follow_up_actions
     
     def _extract_preventive_measures(self, summary_result: AnalysisResult) -> List[str]:
         """提取预防措施建议"""
@@ -236,7 +219,7 @@ class Planner:
                 elif category == 'dependency':
                     preventive_measures.append("加强服务依赖管理和故障隔离机制")
         
-        return list(set(preventive_measures))  # 去重
+        return list(dict.fromkeys(preventive_measures))  # 保序去重
     
     def get_task_status(self, task_id: str) -> Dict[str, Any]:
         """获取任务状态"""
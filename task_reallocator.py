@@ -3,152 +3,346 @@
 根据实时反馈动态调整任务执行的分析器
 """
 
-from typing import Dict, Any, List, Optional
+import sys
+import time
+from array import array
+from collections import deque
+from dataclasses import dataclass
+from enum import IntEnum
+from types import MappingProxyType
+from typing import Dict, Any, List, Optional, Callable, Tuple, Sequence, Iterable
 from datetime import datetime, timedelta
 from analyzer_interface import TaskData, AnalysisResult, TaskType, Priority
 from analyzer_selector import AnalyzerSelector
+from bounded_dict import BoundedDict
+
+
+# 重调度原因，统一驻留，规则表和任务元数据共用同一个字符串对象
+REASON_FAILURE = sys.intern('analysis_failure')
+REASON_LOW_CONFIDENCE = sys.intern('low_confidence')
+REASON_NO_FINDINGS = sys.intern('insufficient_findings')
+REASON_HIGH_ERROR_RATE = sys.intern('high_error_rate')
+
+
+class ReallocReason(IntEnum):
+    """重调度原因编号，用于索引处理函数表"""
+    NONE = 0
+    FAILURE = 1
+    LOW_CONFIDENCE = 2
+    NO_FINDINGS = 3
+
+
+# 原因编号 -> 写入任务元数据的原因名称
+REASON_NAMES = ('', REASON_FAILURE, REASON_LOW_CONFIDENCE, REASON_NO_FINDINGS)
+
+# 重分配任务元数据的固定键集合；三个调整标记默认为 False，由对应的处理函数置为 True
+_BASE_META_KEYS = ('original_task_id', 'reallocation_reason', 'reallocation_timestamp',
+                   'use_fallback_analyzer', 'enhanced_analysis', 'expand_analysis_scope')
+_METADATA_TEMPLATE = dict.fromkeys(_BASE_META_KEYS, False)
+
+# 条件名 -> 原因编号，没有对应编号的条件不会触发重调度
+CONDITION_REASONS: Dict[str, ReallocReason] = {
+    REASON_FAILURE: ReallocReason.FAILURE,
+    REASON_LOW_CONFIDENCE: ReallocReason.LOW_CONFIDENCE,
+    REASON_NO_FINDINGS: ReallocReason.NO_FINDINGS,
+}
+
+
+@dataclass(slots=True, frozen=True)
+class Rule:
+    """重调度规则，谓词在创建时绑定阈值，规则不可修改，需调整时通过 add_reallocation_rule 替换"""
+    condition: str
+    threshold: float
+    action: str
+    description: str
+    predicate: Optional[Callable[[AnalysisResult], bool]] = None
+    reason: ReallocReason = ReallocReason.NONE
+
+
+# 条件名 -> 谓词工厂，工厂接收规则阈值并返回判断分析结果是否触发重调度的函数
+# 重调度判断按 (success, confidence 是否低于阈值, 发现数是否不足) 缓存，谓词只能读取这三个特征，
+# 因此注册表只读，新增条件需要同时扩展 _should_reallocate 的缓存键
+PREDICATE_FACTORIES: MappingProxyType = MappingProxyType({
+    REASON_FAILURE: lambda threshold: lambda result: not result.success,
+    REASON_LOW_CONFIDENCE: lambda threshold: lambda result: result.confidence < threshold,
+    REASON_NO_FINDINGS: lambda threshold: lambda result: len(result.findings) <= threshold,
+})
+
+
+# 置信度过低时的优先级提升表，CRITICAL 保持不变
+_NEXT_PRIORITY: Dict[Priority, Priority] = {
+    Priority(value): Priority(min(value + 1, Priority.CRITICAL.value)) for value in range(1, 5)
+}
+
+# 重调度规则必需字段
+_REQUIRED_RULE_FIELDS = frozenset({'condition', 'threshold', 'action', 'description'})
+
+# 无历史记录时共用的空结果
+_EMPTY_HISTORY: Tuple[AnalysisResult, ...] = ()
+
+
+def _realloc_failure(task_data: TaskData):
+    """分析失败：尝试使用备用分析器"""
+    task_data.metadata['use_fallback_analyzer'] = True
+
+
+def _realloc_low_confidence(task_data: TaskData):
+    """置信度过低：提升任务优先级，使用更全面的分析"""
+    task_data.priority = _NEXT_PRIORITY[task_data.priority]
+    task_data.metadata['enhanced_analysis'] = True
+
+
+def _realloc_no_findings(task_data: TaskData):
+    """没有发现问题：扩大分析范围"""
+    task_data.metadata['expand_analysis_scope'] = True
+
+
+# 原因编号 -> 处理函数，按 ReallocReason 的值直接索引
+_HANDLERS = (None, _realloc_failure, _realloc_low_confidence, _realloc_no_findings)
+
+
+def _format_ts(ts: float) -> str:
+    """将记录时保存的时间戳转换为 ISO 格式，仅在读取时调用"""
+    return datetime.fromtimestamp(ts).isoformat()
 
 
 class TaskReallocator:
     """任务重调度器"""
     
-    def __init__(self, analyzer_selector: AnalyzerSelector):
+    def __init__(self, analyzer_selector: AnalyzerSelector, history_cap: int = 32, max_tracked_tasks: int = 10_000):
         self.analyzer_selector = analyzer_selector
-        self.task_history: Dict[str, List[AnalysisResult]] = {}
-        self.performance_metrics: Dict[str, Dict[str, Any]] = {}
-        self.reallocation_rules: List[Dict[str, Any]] = []
+        # 每个任务只保留最近的若干条结果，跟踪的任务数同样有上限，超出时淘汰最久未使用的任务
+        self.history_cap = history_cap
+        self.task_history: Dict[str, deque] = BoundedDict(max_tracked_tasks)
+        # 每个任务最近一次结果的特征，重试时结果未变化则不重复记录
+        self._last_result_key: Dict[str, Tuple[bool, float, int, str]] = BoundedDict(max_tracked_tasks)
+        # 分析器性能指标按列存储：分析器名称 -> 下标，各计数保存在对应的定长数组中
+        self._metrics_index: Dict[str, int] = {}
+        self._total_tasks = array('q')
+        self._successful_tasks = array('q')
+        self._sum_confidence = array('d')
+        self._last_updated = array('d')
+        self.reallocation_rules: Dict[str, Rule] = {}
+        # 判断结果缓存：(是否成功, 置信度是否低于阈值, 发现数是否不足) -> 重调度原因
+        self._decision_cache: Dict[Tuple[bool, bool, bool], ReallocReason] = {}
+        self._confidence_threshold = 0.0
+        self._findings_threshold = -1
         self._initialize_default_rules()
     
     def _initialize_default_rules(self):
-        """初始化默认重调度规则"""
-        self.reallocation_rules = [
+        """初始化默认重调度规则，按判断优先级排列"""
+        self.reallocation_rules = {}
+        self._reset_decision_cache()
+        for rule in [
+            {
+                'condition': REASON_FAILURE,
+                'threshold': 1,
+                'action': 'fallback_analyzer',
+                'description': '分析失败时使用备用分析器'
+            },
             {
-                'condition': 'low_confidence',
+                'condition': REASON_LOW_CONFIDENCE,
                 'threshold': 0.3,
                 'action': 'retry_with_different_analyzer',
                 'description': '置信度过低时尝试其他分析器'
             },
             {
-                'condition': 'analysis_failure',
-                'threshold': 1,
-                'action': 'fallback_analyzer',
-                'description': '分析失败时使用备用分析器'
+                'condition': REASON_NO_FINDINGS,
+                'threshold': 0,
+                'action': 'expand_analysis_scope',
+                'description': '没有发现问题时扩大分析范围'
             },
             {
-                'condition': 'high_error_rate',
+                'condition': REASON_HIGH_ERROR_RATE,
                 'threshold': 0.5,
                 'action': 'escalate_priority',
                 'description': '错误率过高时提升任务优先级'
             }
-        ]
+        ]:
+            self.add_reallocation_rule(rule)
     
-    async def reallocate_task(self, task_data: TaskData, previous_result: Optional[AnalysisResult] = None) -> TaskData:
+    def reallocate_task(self, task_data: TaskData, previous_result: Optional[AnalysisResult] = None) -> TaskData:
         """重新分配任务"""
+        # 没有上次结果时无需记录和判断
+        if previous_result is None:
+            return task_data
+        
         # 记录任务历史
-        if previous_result:
-            self._record_task_result(task_data.task_id, previous_result)
+        self._record_task_result(task_data.task_id, previous_result)
         
         # 分析是否需要重调度
-        reallocation_needed, reason = self._should_reallocate(task_data, previous_result)
+        reason = self._should_reallocate(previous_result)
         
-        if reallocation_needed:
+        if reason:
             return self._perform_reallocation(task_data, reason)
         
         return task_data
     
-    def _should_reallocate(self, task_data: TaskData, previous_result: Optional[AnalysisResult]) -> tuple[bool, str]:
-        """判断是否需要重调度"""
-        if not previous_result:
-            return False, ""
-        
-        # 检查分析是否失败
-        if not previous_result.success:
-            return True, "analysis_failure"
-        
-        # 检查置信度是否过低
-        if previous_result.confidence < 0.3:
-            return True, "low_confidence"
+    def _should_reallocate(self, result: AnalysisResult) -> ReallocReason:
+        """判断是否需要重调度，不需要时返回 ReallocReason.NONE"""
+        key = (
+            result.success,
+            result.confidence < self._confidence_threshold,
+            len(result.findings) <= self._findings_threshold
+        )
+        decision = self._decision_cache.get(key)
+        if decision is None:
+            decision = self._decision_cache[key] = self._evaluate_rules(result)
         
-        # 检查是否有足够的发现
-        if len(previous_result.findings) == 0:
-            return True, "insufficient_findings"
+        return decision
+    
+    def _evaluate_rules(self, previous_result: AnalysisResult) -> ReallocReason:
+        """按规则顺序依次检查，命中第一条即返回"""
+        for rule in self.reallocation_rules.values():
+            if rule.predicate is not None and rule.predicate(previous_result):
+                return rule.reason
         
-        return False, ""
+        return ReallocReason.NONE
     
-    def _perform_reallocation(self, task_data: TaskData, reason: str) -> TaskData:
+    def _perform_reallocation(self, task_data: TaskData, reason: ReallocReason) -> TaskData:
         """执行任务重分配"""
+        # 元数据从固定键模板复制，只覆盖需要的字段，避免逐键插入时扩容
+        metadata = _METADATA_TEMPLATE.copy()
+        metadata['original_task_id'] = task_data.task_id
+        metadata['reallocation_reason'] = REASON_NAMES[reason]
+        metadata['reallocation_timestamp'] = time.time()
+        
+        # 重分配只调整优先级和元数据，分析器也不会修改输入，直接共享原任务的输入数据
         new_task_data = TaskData(
-            task_id=f"{task_data.task_id}_reallocated",
+            task_id=task_data.task_id + "_reallocated",
             task_type=task_data.task_type,
             priority=task_data.priority,
-            input_data=task_data.input_data.copy(),
-            metadata={
-                'original_task_id': task_data.task_id,
-                'reallocation_reason': reason,
-                'reallocation_timestamp': datetime.now().isoformat()
-            }
+            input_data=task_data.input_data,
+            metadata=metadata
         )
         
         # 根据重调度原因调整任务
-        if reason == "analysis_failure":
-            # 尝试使用备用分析器
-            new_task_data.metadata['use_fallback_analyzer'] = True
-        
-        elif reason == "low_confidence":
-            # 提升任务优先级，使用更全面的分析
-            if new_task_data.priority != Priority.CRITICAL:
-                new_task_data.priority = Priority(min(new_task_data.priority.value + 1, 4))
-            new_task_data.metadata['enhanced_analysis'] = True
-        
-        elif reason == "insufficient_findings":
-            # 扩大分析范围
-            new_task_data.metadata['expand_analysis_scope'] = True
+        _HANDLERS[reason](new_task_data)
         
         return new_task_data
     
     def _record_task_result(self, task_id: str, result: AnalysisResult):
         """记录任务结果"""
-        if task_id not in self.task_history:
-            self.task_history[task_id] = []
-        
-        self.task_history[task_id].append(result)
-        
-        # 更新性能指标
-        analyzer_name = result.analyzer_name
-        if analyzer_name not in self.performance_metrics:
-            self.performance_metrics[analyzer_name] = {
-                'total_tasks': 0,
-                'successful_tasks': 0,
-                'average_confidence': 0.0,
-                'last_updated': datetime.now()
-            }
+        self.record_task_results(((task_id, result),))
+    
+    def record_task_results(self, results: Iterable[Tuple[str, AnalysisResult]]):
+        """批量记录 (任务ID, 分析结果)，按分析器汇总后一次性更新性能指标"""
+        # 分析器名称 -> [任务数, 成功数, 置信度之和]
+        deltas: Dict[str, List[float]] = {}
+        task_history = self.task_history
+        last_result_key = self._last_result_key
+        for task_id, result in results:
+            # 两个映射按相同顺序刷新，超出上限时淘汰的是同一个最久未使用的任务
+            history = task_history.get(task_id)
+            if history is None:
+                history = task_history[task_id] = deque(maxlen=self.history_cap)
+            else:
+                task_history.move_to_end(task_id)
+            
+            result_key = (result.success, round(result.confidence, 3), len(result.findings), result.analyzer_name)
+            if last_result_key.get(task_id) == result_key:
+                last_result_key.move_to_end(task_id)
+                continue
+            last_result_key[task_id] = result_key
+            
+            history.append(result)
+            
+            delta = deltas.get(result.analyzer_name)
+            if delta is None:
+                delta = deltas[result.analyzer_name] = [0, 0, 0.0]
+            delta[0] += 1
+            if result.success:
+                delta[1] += 1
+            delta[2] += result.confidence
         
-        metrics = self.performance_metrics[analyzer_name]
-        metrics['total_tasks'] += 1
-        if result.success:
-            metrics['successful_tasks'] += 1
+        if not deltas:
+            return
         
-        # 更新平均置信度
-        success_rate = metrics['successful_tasks'] / metrics['total_tasks']
-        metrics['success_rate'] = round(success_rate, 2)
-        metrics['last_updated'] = datetime.now()
+        # 更新性能指标：只累加原始计数，比率和均值在读取时计算
+        now = time.time()
+        for analyzer_name, (task_count, success_count, sum_confidence) in deltas.items():
+            index = self._metrics_index.get(analyzer_name)
+            if index is None:
+                index = self._metrics_index[analyzer_name] = len(self._total_tasks)
+                self._total_tasks.append(0)
+                self._successful_tasks.append(0)
+                self._sum_confidence.append(0.0)
+                self._last_updated.append(0.0)
+            
+            self._total_tasks[index] += task_count
+            self._successful_tasks[index] += success_count
+            self._sum_confidence[index] += sum_confidence
+            self._last_updated[index] = now
     
     def get_analyzer_performance(self, analyzer_name: str) -> Optional[Dict[str, Any]]:
         """获取分析器性能指标"""
-        return self.performance_metrics.get(analyzer_name)
+        index = self._metrics_index.get(analyzer_name)
+        if index is None:
+            return None
+        
+        total_tasks = self._total_tasks[index]
+        successful_tasks = self._successful_tasks[index]
+        return {
+            'total_tasks': total_tasks,
+            'successful_tasks': successful_tasks,
+            'success_rate': successful_tasks / total_tasks,
+            'average_confidence': self._sum_confidence[index] / total_tasks,
+            'last_updated': _format_ts(self._last_updated[index])
+        }
     
-    def get_task_history(self, task_id: str) -> List[AnalysisResult]:
+    def get_fleet_performance(self) -> Optional[Dict[str, Any]]:
+        """获取所有分析器的汇总性能指标"""
+        if not self._metrics_index:
+            return None
+        
+        # 直接对各列数组求和
+        total_tasks = sum(self._total_tasks)
+        successful_tasks = sum(self._successful_tasks)
+        return {
+            'analyzer_count': len(self._metrics_index),
+            'total_tasks': total_tasks,
+            'successful_tasks': successful_tasks,
+            'success_rate': successful_tasks / total_tasks,
+            'average_confidence': sum(self._sum_confidence) / total_tasks,
+            'last_updated': _format_ts(max(self._last_updated))
+        }
+    
+    def get_task_history(self, task_id: str) -> Sequence[AnalysisResult]:
         """获取任务历史"""
-        return self.task_history.get(task_id, [])
+        history = self.task_history.get(task_id)
+        if history is None:
+            return _EMPTY_HISTORY
+        return tuple(history)
     
     def add_reallocation_rule(self, rule: Dict[str, Any]):
-        """添加重调度规则"""
-        required_fields = ['condition', 'threshold', 'action', 'description']
-        if all(field in rule for field in required_fields):
-            self.reallocation_rules.append(rule)
-        else:
+        """添加重调度规则，同一条件的规则会被替换"""
+        if not _REQUIRED_RULE_FIELDS.issubset(rule):
             raise ValueError("重调度规则必须包含所有必需字段")
+        
+        # 添加时即生成判断函数，未注册谓词的条件只保存规则，不参与判断
+        condition = rule['condition']
+        factory = PREDICATE_FACTORIES.get(condition)
+        self.reallocation_rules[condition] = Rule(
+            condition=condition,
+            threshold=rule['threshold'],
+            action=rule['action'],
+            description=rule['description'],
+            predicate=factory(rule['threshold']) if factory else None,
+            reason=CONDITION_REASONS.get(condition, ReallocReason.NONE)
+        )
+        self._reset_decision_cache()
     
     def remove_reallocation_rule(self, condition: str):
         """移除重调度规则"""
-        self.reallocation_rules = [r for r in self.reallocation_rules if r['condition'] != condition]
\ No newline at end of file
+        self.reallocation_rules.pop(condition, None)
+        self._reset_decision_cache()
+    
+    def _reset_decision_cache(self):
+        """规则变化后清空判断缓存，并同步缓存键使用的阈值"""
+        self._decision_cache.clear()
+        
+        # 规则不存在时使用不会命中的阈值，对应的缓存键特征恒为 False
+        low_confidence = self.reallocation_rules.get(REASON_LOW_CONFIDENCE)
+        self._confidence_threshold = low_confidence.threshold if low_confidence else 0.0
+        insufficient_findings = self.reallocation_rules.get(REASON_NO_FINDINGS)
+        self._findings_threshold = insufficient_findings.threshold if insufficient_findings else -1
\ No newline at end of file